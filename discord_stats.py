@@ -1,21 +1,45 @@
 #!/usr/bin/env python3
 """Parse a Discord data package and generate an HTML analytics page."""
 
+import heapq
 import json
+import os
 import re
 import sys
 import zipfile
-from collections import Counter
-from datetime import datetime
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
 from html import escape
+from operator import attrgetter, itemgetter
 from pathlib import Path
+from typing import TextIO
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 CH_DM = "DM"
 CH_GROUP_DM = "GROUP_DM"
 
-_WORD_RE = re.compile(r"[a-zA-Z']+")
-_EMOJI_RE = re.compile(
-    "(?:"
+# Decode channels in a process pool only with this many CPUs and at least
+# this much messages.json data in total. Unpickling results in the parent
+# costs 30-50% of a serial decode, so fewer cores barely break even.
+PARALLEL_MIN_CPUS = 4
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+
+_DM_RE = re.compile(r"Direct Message with (.+?)(?:#\d+)?$")
+# Words and emoji in a single scan; dispatch on the matched group name.
+_TOKEN_RE = re.compile(
+    "(?P<word>[a-zA-Z']{2,})"
+    "|(?P<emoji>"
     "["
     "\U0001F600-\U0001F64F"
     "\U0001F300-\U0001F5FF"
@@ -35,7 +59,14 @@ _EMOJI_RE = re.compile(
     flags=re.UNICODE,
 )
 
-STOPWORDS = {
+# Blanks out every byte that cannot be part of a word, so messages without
+# emoji can be tokenized with translate + split instead of the regex.
+_WORD_BYTES = b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'"
+_NON_WORD_TABLE = bytes(b if b in _WORD_BYTES else 0x20 for b in range(256))
+# Lowest codepoint matched by the emoji part of _TOKEN_RE (zero-width joiner)
+_EMOJI_MIN_CHAR = "\u200d"
+
+STOPWORDS = frozenset({
     "the", "a", "an", "is", "are", "was", "were", "be", "been", "being",
     "have", "has", "had", "do", "does", "did", "will", "would", "could",
     "should", "may", "might", "shall", "can", "to", "of", "in", "for",
@@ -49,39 +80,115 @@ STOPWORDS = {
     "those", "am", "if", "then", "else", "when", "up", "out", "about",
     "how", "why", "where", "there", "here", "also", "like", "oh", "im",
     "ok", "yeah", "dont", "thats", "lol", "omg", "u", "ur",
-}
+})
+
 
+def _top_n(items, *, n=20):
+    """Return the n (count, ...) tuples with the highest count, ties in order."""
+    return heapq.nlargest(n, items, key=itemgetter(0))
 
-def _top_n(items, *, key="name", n=20):
-    """Sort items by 'count' descending and return top n."""
-    return sorted(items, key=lambda x: -x["count"])[:n]
+
+def _most_common(tally, n):
+    """Return the n highest (key, count) pairs, ties in insertion order."""
+    return heapq.nlargest(n, tally.items(), key=itemgetter(1))
 
 
 def _rank_table_rows(items, extra_col=None):
     """Build HTML table rows with rank, name, optional extra column, and count."""
-    rows = ""
+    rows = []
     for i, item in enumerate(items, 1):
         extra = f'<td class="server">{escape(item[extra_col])}</td>' if extra_col else ""
-        rows += f'<tr><td class="rank">{i}</td><td>{escape(item["name"])}</td>{extra}<td class="num">{item["count"]:,}</td></tr>'
-    return rows
+        rows.append(f'<tr><td class="rank">{i}</td><td>{escape(item["name"])}</td>{extra}<td class="num">{item["count"]:,}</td></tr>')
+    return "".join(rows)
+
+
+def _loads(raw):
+    """Decode JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # orjson is stricter (e.g. lone surrogates); let json decide
+            pass
+    return json.loads(raw)
+
+
+def _read_member(zf, name):
+    """Return the bytes of an archive member, or None if it is missing."""
+    try:
+        return zf.read(name)
+    except KeyError:
+        return None
+
+
+def _parse_channel(payload):
+    """Decode one channel folder.
+
+    Takes (channel_id, decoded channel.json, messages.json bytes or None,
+    index.json entry) and returns (channel, timestamps, contents,
+    attachments). Only the message fields the stats use are kept, as
+    parallel lists, so results are cheap to send back from worker processes.
+    """
+    channel_id, meta, messages_raw, idx_val = payload
+
+    messages = []
+    if messages_raw is not None:
+        try:
+            messages = _loads(messages_raw)
+        except json.JSONDecodeError:
+            pass
+
+    ch_type = meta.get("type", "UNKNOWN")
+    guild = meta.get("guild", {})
+    guild_name = guild.get("name", "") if guild else ""
+    ch_name = meta.get("name", "")
+
+    if ch_type == CH_DM:
+        m = _DM_RE.match(idx_val)
+        display = m.group(1) if m else idx_val
+        group = "Direct Messages"
+    elif ch_type == CH_GROUP_DM:
+        display = ch_name or idx_val or "Group DM"
+        group = "Group DMs"
+    else:
+        if " in " in idx_val:
+            parts = idx_val.split(" in ", 1)
+            display = f"#{parts[0]}"
+            group = parts[1]
+        else:
+            display = f"#{ch_name}" if ch_name else f"#{channel_id}"
+            group = guild_name or "Unknown Server"
+
+    channel = {
+        "id": channel_id,
+        "name": display,
+        "group": group,
+        "type": ch_type,
+        "message_count": len(messages),
+        "recipients": meta.get("recipients", []),
+    }
+    timestamps = [msg.get("Timestamp") or "" for msg in messages]
+    contents = [msg.get("Contents") or "" for msg in messages]
+    attachments = [bool(msg.get("Attachments")) for msg in messages]
+    return channel, timestamps, contents, attachments
 
 
 def parse_package(zip_path: str) -> dict:
     """Extract all analytics data from a Discord data package."""
     with zipfile.ZipFile(zip_path, "r") as zf:
+        names = zf.namelist()
+
         # Load index
         index = {}
-        try:
-            with zf.open("Messages/index.json") as f:
-                index = json.load(f)
-        except KeyError:
-            pass
+        raw = _read_member(zf, "Messages/index.json")
+        if raw is not None:
+            index = _loads(raw)
 
         # Load user info
         user = {}
         try:
             with zf.open("Account/user.json") as f:
-                user = json.load(f)
+                user = _loads(f.read())
         except KeyError:
             pass
 
@@ -89,165 +196,273 @@ def parse_package(zip_path: str) -> dict:
 
         # Find all channel folders
         channel_dirs = set()
-        for name in zf.namelist():
+        for name in names:
             if name.startswith("Messages/c") and name.endswith("/channel.json"):
                 channel_dirs.add(name.split("/")[1])
 
-        channels = []
-        all_messages = []
-
+        # channel.json is tiny, so decode it here and only read messages.json
+        # for channels whose metadata is usable
+        jobs = []
+        total_bytes = 0
         for cdir in sorted(channel_dirs):
-            channel_id = cdir[1:]
-
             try:
-                with zf.open(f"Messages/{cdir}/channel.json") as f:
-                    meta = json.load(f)
-            except (KeyError, json.JSONDecodeError):
+                meta = _loads(_read_member(zf, f"Messages/{cdir}/channel.json"))
+            except json.JSONDecodeError:
                 continue
-
-            messages = []
+            messages_name = f"Messages/{cdir}/messages.json"
             try:
-                with zf.open(f"Messages/{cdir}/messages.json") as f:
-                    messages = json.load(f)
-            except (KeyError, json.JSONDecodeError):
+                total_bytes += zf.getinfo(messages_name).file_size
+            except KeyError:
                 pass
+            jobs.append((cdir[1:], meta, messages_name, index.get(cdir[1:], "")))
+
+        payloads = None
+        if (os.cpu_count() or 1) >= PARALLEL_MIN_CPUS and total_bytes >= PARALLEL_MIN_BYTES:
+            payloads = [
+                (channel_id, meta, _read_member(zf, messages_name), idx_val)
+                for channel_id, meta, messages_name, idx_val in jobs
+            ]
+        else:
+            # Decode while reading so only one channel's raw bytes are held
+            results = [
+                _parse_channel((channel_id, meta, _read_member(zf, messages_name), idx_val))
+                for channel_id, meta, messages_name, idx_val in jobs
+            ]
+
+    # Decoding is CPU-bound, so spread it over processes for big packages
+    if payloads is not None:
+        try:
+            with ProcessPoolExecutor() as ex:
+                results = list(ex.map(_parse_channel, payloads, chunksize=16))
+        except (OSError, NotImplementedError, BrokenProcessPool):
+            # No usable multiprocessing here (sandboxes, some containers)
+            results = [_parse_channel(p) for p in payloads]
+
+    channels = []
+    timestamps = []
+    contents = []
+    attachments = []
+    for result in results:
+        channel = result[0]
+        # Channels of one server share a group name; keep a single copy.
+        # Done here because interning does not survive the trip back from
+        # a worker process.
+        channel["group"] = sys.intern(channel["group"])
+        channels.append(channel)
+        timestamps.extend(result[1])
+        contents.extend(result[2])
+        attachments.extend(result[3])
+
+    return {
+        "channels": channels,
+        "timestamps": timestamps,
+        "contents": contents,
+        "attachments": attachments,
+        "user": user,
+    }
 
-            ch_type = meta.get("type", "UNKNOWN")
-            guild = meta.get("guild", {})
-            guild_name = guild.get("name", "") if guild else ""
-            ch_name = meta.get("name", "")
-
-            idx_val = index.get(channel_id, "")
-            if ch_type == CH_DM:
-                m = re.match(r"Direct Message with (.+?)(?:#\d+)?$", idx_val)
-                display = m.group(1) if m else idx_val
-                group = "Direct Messages"
-            elif ch_type == CH_GROUP_DM:
-                display = ch_name or idx_val or "Group DM"
-                group = "Group DMs"
-            else:
-                if " in " in idx_val:
-                    parts = idx_val.split(" in ", 1)
-                    display = f"#{parts[0]}"
-                    group = parts[1]
-                else:
-                    display = f"#{ch_name}" if ch_name else f"#{channel_id}"
-                    group = guild_name or "Unknown Server"
-
-            for msg in messages:
-                msg["_channel"] = display
-                msg["_group"] = group
-                msg["_type"] = ch_type
-            all_messages.extend(messages)
-
-            channels.append({
-                "id": channel_id,
-                "name": display,
-                "group": group,
-                "type": ch_type,
-                "message_count": len(messages),
-                "recipients": meta.get("recipients", []),
-            })
-
-    return {"channels": channels, "messages": all_messages, "user": user}
+
+def _tally_timestamps_np(stamped):
+    """Vectorized _tally_timestamps; raises ValueError on any odd timestamp."""
+    text = np.array(stamped, dtype="U19")
+    if not (np.char.str_len(text) == 19).all():
+        raise ValueError("timestamp shorter than YYYY-MM-DD HH:MM:SS")
+    secs = text.astype("datetime64[s]")
+    days = secs.astype("datetime64[D]")
+
+    # Keep days in first-seen order, like the dict the pure Python path builds
+    uniq, first, counts = np.unique(days, return_index=True, return_counts=True)
+    order = np.argsort(first, kind="stable")
+    day_counts = dict(zip(uniq[order].astype(str).tolist(), counts[order].tolist()))
+
+    uniq, counts = np.unique(secs.astype("datetime64[M]"), return_counts=True)
+    monthly = dict(zip(uniq.astype(str).tolist(), counts.tolist()))
+
+    hours = (secs - days).astype("timedelta64[h]").astype(np.int64)
+    hourly = dict(enumerate(np.bincount(hours, minlength=24).tolist()))
+
+    # 1970-01-01 was a Thursday, weekday() == 3
+    weekdays = (days.astype(np.int64) + 3) % 7
+    daily_dow = dict(enumerate(np.bincount(weekdays, minlength=7).tolist()))
+
+    uniq, counts = np.unique(secs.astype("datetime64[Y]").astype(np.int64) + 1970, return_counts=True)
+    yearly = dict(zip(uniq.tolist(), counts.tolist()))
+
+    return day_counts, monthly, hourly, daily_dow, yearly
+
+
+def _tally_timestamps(stamped):
+    """Count timestamps per day, month, hour of day, weekday and year.
+
+    Returns (day_counts, monthly, hourly, daily_dow, yearly) dicts. Uses
+    NumPy when it is installed and every timestamp parses cleanly.
+    """
+    if np is not None and stamped:
+        try:
+            return _tally_timestamps_np(stamped)
+        except ValueError:
+            pass
+
+    # Python only parses; the tallies are bulk Counter builds over map(),
+    # which count in C instead of a += per key per message
+    valid = []
+    parsed = []
+    for ts in stamped:
+        # Slice the fixed-width "YYYY-MM-DD HH:MM:SS" prefix directly;
+        # strptime re-parses its format string on every call.
+        try:
+            parsed.append(datetime(int(ts[0:4]), int(ts[5:7]), int(ts[8:10]), int(ts[11:13])))
+        except ValueError:
+            continue
+        valid.append(ts)
+
+    day_counts = Counter(map(itemgetter(slice(0, 10)), stamped))
+    monthly = Counter(map(itemgetter(slice(0, 7)), valid))
+    hourly = Counter(map(attrgetter("hour"), parsed))
+    daily_dow = Counter(map(datetime.weekday, parsed))
+    yearly = Counter(map(attrgetter("year"), parsed))
+    return day_counts, monthly, hourly, daily_dow, yearly
+
+
+def _longest_streak_np(days):
+    """Vectorized _longest_streak; raises ValueError on any invalid day."""
+    text = np.array(days, dtype="U10")
+    if not (np.char.str_len(text) == 10).all():
+        raise ValueError("day is not YYYY-MM-DD")
+    ordinals = text.astype("datetime64[D]").astype(np.int64)
+    # A run starts at the first day and after every gap of more than one day
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(ordinals) != 1) + 1))
+    lengths = np.diff(np.append(starts, len(days)))
+    best = int(lengths.argmax())
+    return int(lengths[best]), days[starts[best]]
+
+
+def _longest_streak(days):
+    """Return (length, first day) of the longest run of consecutive days.
+
+    ``days`` are sorted "YYYY-MM-DD" strings; invalid dates are skipped.
+    """
+    if np is not None and days:
+        try:
+            return _longest_streak_np(days)
+        except ValueError:
+            pass
+
+    # Compare day ordinals instead of parsing each date twice
+    sorted_dates = []
+    ordinals = []
+    for day in days:
+        try:
+            ordinals.append(date(int(day[0:4]), int(day[5:7]), int(day[8:10])).toordinal())
+        except ValueError:
+            continue
+        sorted_dates.append(day)
+    longest_streak = 0
+    current_streak = 1
+    streak_start = sorted_dates[0] if sorted_dates else ""
+    best_streak_start = streak_start
+    for i in range(1, len(sorted_dates)):
+        if ordinals[i] - ordinals[i - 1] == 1:
+            current_streak += 1
+        else:
+            if current_streak > longest_streak:
+                longest_streak = current_streak
+                best_streak_start = streak_start
+            current_streak = 1
+            streak_start = sorted_dates[i]
+    if current_streak > longest_streak:
+        longest_streak = current_streak
+        best_streak_start = streak_start
+    return longest_streak, best_streak_start
 
 
 def compute_stats(data: dict) -> dict:
     """Compute all the analytics."""
     channels = data["channels"]
-    messages = data["messages"]
+    timestamps = data["timestamps"]
+    contents = data["contents"]
     stats = {}
 
-    dm_types = {CH_DM, CH_GROUP_DM}
-
-    stats["total_messages"] = len(messages)
-    stats["total_channels"] = len(channels)
-    stats["total_dms"] = sum(1 for c in channels if c["type"] == CH_DM)
-    stats["total_group_dms"] = sum(1 for c in channels if c["type"] == CH_GROUP_DM)
-    stats["total_servers"] = len(set(
-        c["group"] for c in channels if c["type"] not in dm_types
-    ))
-
-    stats["top_dms"] = _top_n(
-        [{"name": c["name"], "count": c["message_count"]}
-         for c in channels if c["type"] == CH_DM and c["message_count"] > 0],
-        n=25,
-    )
-    stats["top_group_dms"] = _top_n(
-        [{"name": c["name"], "count": c["message_count"]}
-         for c in channels if c["type"] == CH_GROUP_DM and c["message_count"] > 0],
-        n=15,
-    )
-
-    server_msgs = Counter()
+    # Partition channels by type in one pass
+    dms = []
+    group_dms = []
+    server_channels = []
+    server_msgs = defaultdict(int)
     for c in channels:
-        if c["type"] not in dm_types:
+        ch_type = c["type"]
+        if ch_type == CH_DM:
+            dms.append(c)
+        elif ch_type == CH_GROUP_DM:
+            group_dms.append(c)
+        else:
+            server_channels.append(c)
             server_msgs[c["group"]] += c["message_count"]
-    stats["top_servers"] = _top_n(
-        [{"name": k, "count": v} for k, v in server_msgs.items() if v > 0],
-        n=20,
-    )
-
-    stats["top_channels"] = _top_n(
-        [{"name": c["name"], "server": c["group"], "count": c["message_count"]}
-         for c in channels if c["type"] not in dm_types and c["message_count"] > 0],
-        n=20,
-    )
 
-    # Single pass over all messages for every per-message stat
-    monthly = Counter()
-    hourly = Counter()
-    daily_dow = Counter()
-    yearly = Counter()
-    day_counts = Counter()
-    word_counter = Counter()
-    emoji_counter = Counter()
+    stats["total_messages"] = len(timestamps)
+    stats["total_channels"] = len(channels)
+    stats["total_dms"] = len(dms)
+    stats["total_group_dms"] = len(group_dms)
+    stats["total_servers"] = len(server_msgs)
+
+    # Rank plain tuples and only build result dicts for the top entries
+    dm_counts = [(c["message_count"], c["name"]) for c in dms if c["message_count"] > 0]
+    stats["top_dms"] = [{"name": name, "count": count}
+                        for count, name in _top_n(dm_counts, n=25)]
+    gdm_counts = [(c["message_count"], c["name"]) for c in group_dms if c["message_count"] > 0]
+    stats["top_group_dms"] = [{"name": name, "count": count}
+                              for count, name in _top_n(gdm_counts, n=15)]
+
+    srv_counts = [(v, k) for k, v in server_msgs.items() if v > 0]
+    stats["top_servers"] = [{"name": name, "count": count}
+                            for count, name in _top_n(srv_counts, n=20)]
+
+    ch_counts = [(c["message_count"], c["name"], c["group"])
+                 for c in server_channels if c["message_count"] > 0]
+    stats["top_channels"] = [{"name": name, "server": server, "count": count}
+                             for count, name, server in _top_n(ch_counts, n=20)]
+
+    # One pass over each message column
+    stamped = [ts for ts in timestamps if ts]
+    day_counts, monthly, hourly, daily_dow, yearly = _tally_timestamps(stamped)
+
+    word_counter = defaultdict(int)
+    emoji_counter = defaultdict(int)
     dow_names = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+    find_tokens = _TOKEN_RE.finditer
 
     total_chars = 0
     total_words = 0
     max_msg_len = 0
     msg_with_content = 0
-    attachment_count = 0
-    min_ts = None
-    max_ts = None
-
-    for msg in messages:
-        ts = msg.get("Timestamp", "")
-        if ts:
-            if min_ts is None or ts < min_ts:
-                min_ts = ts
-            if max_ts is None or ts > max_ts:
-                max_ts = ts
-            day_counts[ts[:10]] += 1
-            try:
-                dt = datetime.strptime(ts[:19], "%Y-%m-%d %H:%M:%S")
-            except ValueError:
-                pass
-            else:
-                monthly[dt.strftime("%Y-%m")] += 1
-                hourly[dt.hour] += 1
-                daily_dow[dt.weekday()] += 1
-                yearly[dt.year] += 1
-
-        text = msg.get("Contents", "")
-        if text:
-            length = len(text)
-            total_chars += length
-            if length > max_msg_len:
-                max_msg_len = length
-            total_words += len(text.split())
-            msg_with_content += 1
-
-            for w in _WORD_RE.findall(text.lower()):
+
+    for text in contents:
+        if not text:
+            continue
+        length = len(text)
+        total_chars += length
+        if length > max_msg_len:
+            max_msg_len = length
+        # Not text.count(" ") + 1: that miscounts newlines and repeated spaces
+        total_words += len(text.split())
+        msg_with_content += 1
+
+        if ":" not in text and (text.isascii() or max(text) < _EMOJI_MIN_CHAR):
+            # No emoji or shortcodes possible, so only words to pick out.
+            # Non-ASCII characters encode to "?" and become separators, as
+            # they are for the regex.
+            raw = text.encode("ascii", "replace").translate(_NON_WORD_TABLE)
+            for w in raw.lower().decode("ascii").split():
                 if len(w) >= 2 and w not in STOPWORDS:
                     word_counter[w] += 1
+            continue
 
-            for match in _EMOJI_RE.findall(text):
-                emoji_counter[match] += 1
-
-        if msg.get("Attachments"):
-            attachment_count += 1
+        for m in find_tokens(text):
+            if m.lastgroup == "word":
+                w = m.group().lower()
+                if w not in STOPWORDS:
+                    word_counter[w] += 1
+            else:
+                emoji_counter[m.group()] += 1
 
     stats["monthly"] = sorted(monthly.items())
     stats["hourly"] = [(h, hourly.get(h, 0)) for h in range(24)]
@@ -258,45 +473,26 @@ def compute_stats(data: dict) -> dict:
     stats["max_msg_length"] = max_msg_len
     stats["total_characters"] = total_chars
     stats["total_words"] = total_words
-    stats["attachment_count"] = attachment_count
-    stats["top_words"] = word_counter.most_common(30)
-    stats["top_emoji"] = emoji_counter.most_common(20)
+    stats["attachment_count"] = sum(data["attachments"])
+    stats["top_words"] = _most_common(word_counter, 30)
+    stats["top_emoji"] = _most_common(emoji_counter, 20)
 
-    if min_ts:
-        stats["first_message"] = min_ts
-        stats["last_message"] = max_ts
+    if stamped:
+        stats["first_message"] = min(stamped)
+        stats["last_message"] = max(stamped)
         stats["active_days"] = len(day_counts)
     else:
         stats["first_message"] = ""
         stats["last_message"] = ""
         stats["active_days"] = 0
 
-    # Longest streak
-    sorted_dates = sorted(day_counts.keys())
-    longest_streak = 0
-    current_streak = 1
-    streak_start = sorted_dates[0] if sorted_dates else ""
-    best_streak_start = streak_start
-    for i in range(1, len(sorted_dates)):
-        prev = datetime.strptime(sorted_dates[i - 1], "%Y-%m-%d")
-        curr = datetime.strptime(sorted_dates[i], "%Y-%m-%d")
-        if (curr - prev).days == 1:
-            current_streak += 1
-        else:
-            if current_streak > longest_streak:
-                longest_streak = current_streak
-                best_streak_start = streak_start
-            current_streak = 1
-            streak_start = sorted_dates[i]
-    if current_streak > longest_streak:
-        longest_streak = current_streak
-        best_streak_start = streak_start
+    longest_streak, best_streak_start = _longest_streak(sorted(day_counts))
     stats["longest_streak"] = longest_streak
     stats["longest_streak_start"] = best_streak_start
 
     # Busiest day
     if day_counts:
-        busiest = day_counts.most_common(1)[0]
+        busiest = max(day_counts.items(), key=lambda kv: kv[1])
         stats["busiest_day"] = busiest[0]
         stats["busiest_day_count"] = busiest[1]
     else:
@@ -317,7 +513,8 @@ def compute_stats(data: dict) -> dict:
     return stats
 
 
-def build_html(stats: dict, user: dict) -> str:
+def build_html(stats: dict, user: dict, out: TextIO) -> None:
+    """Write the stats page to out section by section."""
     username = user.get("global_name") or user.get("username") or "User"
     created_at = user.get("created_at", "")
 
@@ -374,7 +571,7 @@ def build_html(stats: dict, user: dict) -> str:
     dominant_period = max(tod, key=tod.get).replace("night", "late night")
     dominant_pct = f"{max(tod.values()) / sum(tod.values()) * 100:.0f}" if sum(tod.values()) else "0"
 
-    return f'''<!DOCTYPE html>
+    out.write(f'''<!DOCTYPE html>
 <html lang="en">
 <head>
 <meta charset="UTF-8">
@@ -596,7 +793,8 @@ tr:hover td {{ background: rgba(255,255,255,0.03); }}
 }}
 </style>
 </head>
-<body>
+''')
+    out.write(f'''<body>
 
 <div class="header">
   <h1>{escape(username)}&rsquo;s Discord Wrapped</h1>
@@ -730,7 +928,8 @@ tr:hover td {{ background: rgba(255,255,255,0.03); }}
 
 </div>
 
-<script>
+''')
+    out.write(f'''<script>
 Chart.defaults.color = "#8b8ba7";
 Chart.defaults.borderColor = "rgba(255,255,255,0.05)";
 Chart.defaults.font.family = "'DM Sans', system-ui, sans-serif";
@@ -815,7 +1014,7 @@ barChart("dmChart", {dm_labels}, {dm_values}, rose, {{ horizontal: true }});
 barChart("srvChart", {srv_labels}, {srv_values}, accent, {{ horizontal: true }});
 </script>
 </body>
-</html>'''
+</html>''')
 
 
 def main():
@@ -834,15 +1033,15 @@ def main():
 
     print(f"Reading {zip_path}...")
     data = parse_package(zip_path)
-    print(f"Found {len(data['channels'])} channels, {len(data['messages']):,} messages")
+    print(f"Found {len(data['channels'])} channels, {len(data['timestamps']):,} messages")
 
     print("Computing stats...")
     stats = compute_stats(data)
 
     print("Generating HTML...")
-    html = build_html(stats, data["user"])
+    with Path(output_path).open("w", encoding="utf-8", buffering=1 << 20) as out:
+        build_html(stats, data["user"], out)
 
-    Path(output_path).write_text(html, encoding="utf-8")
     size_kb = Path(output_path).stat().st_size / 1024
     print(f"Written to {output_path} ({size_kb:.0f} KB)")
     print("Open it in a browser to view your stats!")